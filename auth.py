@@ -1,7 +1,6 @@
 import os
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 
 def authenticate(SCOPES):
@@ -18,7 +17,8 @@ def authenticate(SCOPES):
             # Refresh expired token
             creds.refresh(Request())
         else:
-            # Get new credentials
+            # Get new credentials (oauthlib is only needed for this interactive flow)
+            from google_auth_oauthlib.flow import InstalledAppFlow
             flow = InstalledAppFlow.from_client_secrets_file(
                 'credentials.json', SCOPES)
             creds = flow.run_local_server(port=0)
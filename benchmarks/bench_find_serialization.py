@@ -0,0 +1,151 @@
+"""
+Serialization benchmark for /events/find over a large result set
+
+Builds the find response for 5k raw Google events two ways and serializes it:
+
+    before - one 11-key dict per event, through jsonable_encoder and json.dumps
+             (what FastAPI's default JSONResponse does)
+    after  - one EventRecord per event, straight through orjson
+
+Both paths share the same time parsing and formatting, so the numbers only
+differ by the event container and the serializer. Reports time and peak memory.
+
+    python benchmarks/bench_find_serialization.py [events]
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from operator import attrgetter, itemgetter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import orjson  # noqa: E402
+import pytz  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from findEvents import EventRecord  # noqa: E402
+
+CALENDARS = 10
+LOCAL_TZ = pytz.timezone('US/Eastern')
+
+
+def make_calendars(count):
+    calendars = []
+    for i in range(CALENDARS):
+        events = [{
+            'id': f'evt{i}-{j}',
+            'summary': f'Task {j}',
+            'description': 'Planned by the scheduling agent',
+            'location': '',
+            'status': 'confirmed',
+            'created': '2025-01-01T00:00:00.000Z',
+            'updated': '2025-01-01T00:00:00.000Z',
+            'start': {'dateTime': f'2025-01-15T{9 + j % 8:02d}:00:00-05:00'},
+            'end': {'dateTime': f'2025-01-15T{10 + j % 8:02d}:00:00-05:00'},
+        } for j in range(count // CALENDARS)]
+        calendars.append(({'id': f'cal{i}@group.calendar.google.com', 'summary': f'Calendar {i}'}, events))
+    return calendars
+
+
+def display_times(event):
+    """Start/end display strings, as find_events_by_date formats them"""
+    start = datetime.fromisoformat(event['start']['dateTime'].replace('Z', '+00:00'))
+    end = datetime.fromisoformat(event['end']['dateTime'].replace('Z', '+00:00'))
+    return (start.astimezone(LOCAL_TZ).strftime('%I:%M %p'),
+            end.astimezone(LOCAL_TZ).strftime('%I:%M %p'))
+
+
+def envelope(events):
+    return {
+        'message': f'Found {len(events)} events on 2025-01-15',
+        'date': '2025-01-15',
+        'total_events': len(events),
+        'events': events,
+        'search_params': {
+            'start_time': '2025-01-15T05:00:00+00:00',
+            'end_time': '2025-01-16T04:59:59.999999+00:00',
+            'calendars_searched': CALENDARS,
+            'timezone_used': str(LOCAL_TZ)
+        }
+    }
+
+
+def build_dicts(calendars):
+    """The response as it was built before EventRecord"""
+    events = []
+    for calendar, raw_events in calendars:
+        calendar_id = calendar['id']
+        calendar_name = calendar.get('summary', 'Unknown Calendar')
+        for event in raw_events:
+            start_display, end_display = display_times(event)
+            events.append({
+                'title': event.get('summary', 'No Title'),
+                'start_time': start_display,
+                'end_time': end_display,
+                'calendar': calendar_name,
+                'calendar_id': calendar_id,
+                'event_id': event.get('id', 'Unknown ID'),
+                'description': event.get('description', ''),
+                'location': event.get('location', ''),
+                'status': event.get('status', 'confirmed'),
+                'created': event.get('created', ''),
+                'updated': event.get('updated', '')
+            })
+    events.sort(key=itemgetter('start_time'))
+    return envelope(events)
+
+
+def build_records(calendars):
+    """The response as find_events_by_date builds it now"""
+    events = []
+    for calendar, raw_events in calendars:
+        calendar_id = calendar['id']
+        calendar_name = calendar.get('summary', 'Unknown Calendar')
+        for event in raw_events:
+            start_display, end_display = display_times(event)
+            events.append(EventRecord(
+                title=event.get('summary', 'No Title'),
+                start_time=start_display,
+                end_time=end_display,
+                calendar=calendar_name,
+                calendar_id=calendar_id,
+                event_id=event.get('id', 'Unknown ID'),
+                description=event.get('description', ''),
+                location=event.get('location', ''),
+                status=event.get('status', 'confirmed'),
+                created=event.get('created', ''),
+                updated=event.get('updated', '')
+            ))
+    events.sort(key=attrgetter('start_time'))
+    return envelope(events)
+
+
+def measure(label, build, serialize, calendars):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(calendars)
+    built = time.perf_counter()
+    body = serialize(result)
+    done = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} build {1000 * (built - start):8.1f} ms  "
+          f"serialize {1000 * (done - built):8.1f} ms  "
+          f"peak {peak / 2 ** 20:7.1f} MiB  body {len(body) / 2 ** 20:5.2f} MiB")
+    return body
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    calendars = make_calendars(count)
+
+    print(f"{count} events across {CALENDARS} calendars")
+    # Same json.dumps arguments as starlette's JSONResponse.render
+    before = measure('before', build_dicts,
+                     lambda r: json.dumps(jsonable_encoder(r), ensure_ascii=False, allow_nan=False,
+                                          indent=None, separators=(',', ':')).encode('utf-8'), calendars)
+    after = measure('after', build_records, orjson.dumps, calendars)
+    assert before == after, "both paths must produce the same response body"
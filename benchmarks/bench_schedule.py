@@ -0,0 +1,95 @@
+"""
+Scheduler benchmark: 200 tasks over a 4-week horizon
+
+Generates a typical week of meetings (a couple of events per working day on
+each of a few calendars) in Google's event format, then times the local part
+of /schedule: busy interval extraction with the free-slot sweep, and task
+placement. Placement is reported separately for the tasks that fit and the
+ones that don't (which scan every remaining gap before giving up). Tasks that
+don't fit never change the gaps, so the two parts add up to one full run.
+
+    python benchmarks/bench_schedule.py [tasks] [weeks]
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from scheduleTasks import busy_intervals, free_slots, place_tasks  # noqa: E402
+
+CALENDARS = 2
+EVENTS_PER_DAY = 2  # per calendar
+TASK_MINUTES = (15, 30, 45)
+REPEATS = 20
+
+
+def make_events(rng, start, days):
+    events = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        for _ in range(EVENTS_PER_DAY):
+            begin = datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(7 * 60, 19 * 60, 15))
+            end = begin + timedelta(minutes=rng.choice((15, 30, 45, 60, 90)))
+            events.append({
+                'start': {'dateTime': begin.strftime('%Y-%m-%dT%H:%M:%S-05:00')},
+                'end': {'dateTime': end.strftime('%Y-%m-%dT%H:%M:%S-05:00')},
+                'transparency': 'transparent' if rng.random() < 0.1 else 'opaque'
+            })
+    return events
+
+
+def make_tasks(rng, count, start, days):
+    tasks = []
+    for i in range(count):
+        task = {
+            'title': f'Task {i}',
+            'duration_minutes': rng.choice(TASK_MINUTES),
+            'priority': rng.randrange(4)
+        }
+        if rng.random() < 0.3:
+            task['deadline'] = datetime.combine(start + timedelta(days=rng.randrange(3, days)), datetime.min.time())
+        tasks.append(task)
+    return tasks
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    weeks = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    days = weeks * 7
+    rng = random.Random(42)
+    start = date(2025, 1, 6)
+    events = [event for _ in range(CALENDARS) for event in make_events(rng, start, days)]
+    tasks = make_tasks(rng, count, start, days)
+
+    buffer = timedelta(minutes=10)
+
+    def sweep():
+        return free_slots(busy_intervals(events), start, start + timedelta(days=days - 1),
+                          datetime.strptime('09:00', '%H:%M').time(),
+                          datetime.strptime('17:00', '%H:%M').time(),
+                          {0, 1, 2, 3, 4}, buffer)
+
+    free_count = len(sweep())
+    placed, unplaced = place_tasks(sweep(), tasks, buffer)
+    fitting = [task for task, _, _ in placed]
+
+    timings = {'sweep': [], 'placed': [], 'unplaced': []}
+    for _ in range(REPEATS):
+        began = time.perf_counter()
+        gaps = sweep()
+        swept = time.perf_counter()
+        place_tasks(gaps, fitting, buffer)
+        done = time.perf_counter()
+        place_tasks(gaps, unplaced, buffer)
+        timings['sweep'].append(swept - began)
+        timings['placed'].append(done - swept)
+        timings['unplaced'].append(time.perf_counter() - done)
+
+    print(f"{count} tasks, {weeks} weeks, {len(events)} events, {free_count} free gaps")
+    print(f"placed {len(placed)}, unplaced {len(unplaced)}")
+    for label, values in timings.items():
+        values.sort()
+        print(f"{label:<9} median {1000 * values[len(values) // 2]:.2f} ms, best {1000 * values[0]:.2f} ms over {REPEATS} runs")
@@ -0,0 +1,81 @@
+"""
+Startup benchmark: import time of the app and time until /ready answers
+
+Prints the slowest imports from `python -X importtime -c "import main"` and the
+wall time from launching uvicorn to the first 200 from /ready (or / for trees
+that predate /ready). Point it at another checkout to compare before and after:
+
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_startup.py /tmp/before
+    python benchmarks/bench_startup.py [app_dir] [runs]
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+IMPORT_RUNS = 5
+PORT = 8765
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def import_times(root):
+    """Return main's cumulative import time and [(cumulative_us, module)] for its direct imports, slowest first"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=root, capture_output=True, text=True, check=True
+    )
+    total = 0
+    direct = []
+    for match in LINE.finditer(result.stderr):
+        cumulative, indent, module = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 1 and module == 'main':
+            total = cumulative
+        elif indent == 3:  # one nesting level below main
+            direct.append((cumulative, module))
+    return total, sorted(direct, reverse=True)
+
+
+def cold_start(root):
+    """Seconds from process launch until /ready (or / if there is no /ready) returns 200"""
+    began = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(PORT), '--log-level', 'warning'],
+        cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    path = '/ready'
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{PORT}{path}', timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - began
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    path = '/'
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise RuntimeError('server exited during startup')
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else ROOT
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    # Keep the run with the median total; the first run also pays for cold .pyc compilation
+    samples = sorted(import_times(root) for _ in range(IMPORT_RUNS))
+    total, direct = samples[len(samples) // 2]
+    print(f"import main: {total / 1000:.1f} ms total (median of {IMPORT_RUNS}), slowest direct imports:")
+    for us, module in direct[:15]:
+        print(f"  {us / 1000:8.1f} ms  {module}")
+
+    starts = sorted(cold_start(root) for _ in range(runs))
+    print(f"cold start to /ready: median {starts[len(starts) // 2]:.2f} s, best {starts[0]:.2f} s over {runs} runs")
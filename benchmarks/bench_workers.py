@@ -0,0 +1,67 @@
+"""
+Scaling benchmark for the cache backends from 1 to N worker processes
+
+Each worker simulates the request path: look a key up in the cache and, on a
+miss, pay a fake upstream Google latency and store the result. With the memory
+backend every worker warms its own copy, with the disk backend they share one.
+
+    python benchmarks/bench_workers.py [max_workers] [requests_per_worker]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from cache import MemoryBackend, DiskBackend  # noqa: E402
+
+KEYS = 500
+UPSTREAM_LATENCY = 0.005  # seconds per simulated Google call
+TTL = 300
+
+
+def worker(backend_name, directory, requests, seed, results):
+    backend = DiskBackend(directory) if backend_name == 'disk' else MemoryBackend()
+    rng = random.Random(seed)
+    hits = 0
+    for _ in range(requests):
+        # Skewed key popularity, like a handful of active users hitting the same dates
+        key = ('user', int(rng.paretovariate(1.2)) % KEYS)
+        if backend.get(key) is not None:
+            hits += 1
+        else:
+            time.sleep(UPSTREAM_LATENCY)
+            backend.set(key, {'items': list(range(20))}, TTL)
+    results.put(hits)
+
+
+def run(backend_name, workers, requests):
+    ctx = get_context('spawn')
+    results = ctx.Queue()
+    with tempfile.TemporaryDirectory() as directory:
+        processes = [
+            ctx.Process(target=worker, args=(backend_name, directory, requests, seed, results))
+            for seed in range(workers)
+        ]
+        start = time.perf_counter()
+        for p in processes:
+            p.start()
+        hits = sum(results.get() for _ in processes)
+        for p in processes:
+            p.join()
+        elapsed = time.perf_counter() - start
+    total = workers * requests
+    return total / elapsed, hits / total
+
+
+if __name__ == "__main__":
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    print(f"{'backend':<8} {'workers':>7} {'req/s':>10} {'hit rate':>9}")
+    for backend_name in ('memory', 'disk'):
+        for workers in range(1, max_workers + 1):
+            throughput, hit_rate = run(backend_name, workers, requests)
+            print(f"{backend_name:<8} {workers:>7} {throughput:>10.0f} {hit_rate:>9.1%}")
@@ -0,0 +1,104 @@
+"""
+Local load test for quota accounting and admission control
+
+Drives AdmissionController on a simulated clock: one heavy agent session
+hammering /events/find (a fan-out over every calendar) while a crowd of
+normal users mixes event creates and finds. Upstream latency rises as
+project usage approaches the limit. Thresholds come from the same QUOTA_* /
+LATENCY_* / ADMISSION_* environment variables as the server, so they can be
+tuned here first.
+
+    QUOTA_PROJECT_LIMIT=3000 python benchmarks/load_test.py [seconds]
+"""
+import os
+import random
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from cache import MemoryBackend  # noqa: E402
+from quota import (AdmissionController, QuotaExceeded, QUOTA_PROJECT_LIMIT, PROJECT,  # noqa: E402
+                   ADMISSION_QUEUE_TIMEOUT)
+
+TICK = 0.1  # simulated seconds per step
+CALENDARS = 10
+HEAVY_RATE = 5.0  # finds per second from the heavy session
+USERS = 20
+USER_RATE = 0.3  # requests per second per normal user
+BASE_LATENCY = 0.15
+
+# Upstream calls made by each request type, and its admission priority
+REQUESTS = {
+    'find': ('low', [('calendar.calendarList.list', 1), ('calendar.events.list', CALENDARS)]),
+    'create': ('high', [('calendar.events.insert', 1)]),
+}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def main(duration):
+    rng = random.Random(7)
+    clock = Clock()
+    controller = AdmissionController(backend=MemoryBackend(), clock=clock)
+    stats = {'heavy': Counter(), 'users': Counter()}
+    pending = []  # (group, owner, kind, deadline, queued)
+    peak = 0.0
+
+    def execute(owner, kind):
+        for method_id, count in REQUESTS[kind][1]:
+            controller.record_call(owner, method_id, count)
+        pressure = controller.usage(PROJECT) / QUOTA_PROJECT_LIMIT
+        controller.record_latency(BASE_LATENCY * (1 + 4 * pressure ** 3) * rng.uniform(0.8, 1.2))
+
+    def attempt(group, owner, kind, deadline, queued):
+        try:
+            controller.check(owner, REQUESTS[kind][0])
+        except QuotaExceeded as e:
+            if e.final:
+                stats[group][f'{kind} 429 user quota'] += 1
+            elif clock.now >= deadline:
+                stats[group][f'{kind} 429 shed'] += 1
+            else:
+                pending.append((group, owner, kind, deadline, True))
+            return
+        execute(owner, kind)
+        stats[group][f'{kind} admitted after queueing' if queued else f'{kind} admitted'] += 1
+
+    steps = int(duration / TICK)
+    for step in range(steps):
+        clock.now = step * TICK
+        waiting, pending[:] = list(pending), []
+        for item in waiting:
+            attempt(*item)
+
+        arrivals = []
+        if rng.random() < HEAVY_RATE * TICK:
+            arrivals.append(('heavy', 'heavy-agent', 'find'))
+        for user in range(USERS):
+            if rng.random() < USER_RATE * TICK:
+                arrivals.append(('users', f'user-{user}', 'create' if rng.random() < 0.6 else 'find'))
+        for group, owner, kind in arrivals:
+            attempt(group, owner, kind, clock.now + ADMISSION_QUEUE_TIMEOUT, False)
+
+        peak = max(peak, controller.usage(PROJECT) / QUOTA_PROJECT_LIMIT)
+        if step % int(30 / TICK) == 0:
+            print(f"t={clock.now:5.0f}s project usage {controller.usage(PROJECT):6d} "
+                  f"({controller.usage(PROJECT) / QUOTA_PROJECT_LIMIT:4.0%}), "
+                  f"heavy {controller.usage('heavy-agent'):5d}, latency {controller.latency():.2f}s")
+
+    print(f"\npeak project usage {peak:.0%} of {QUOTA_PROJECT_LIMIT} units per window")
+    for group, counter in stats.items():
+        print(f"{group}:")
+        for outcome, count in sorted(counter.items()):
+            print(f"  {outcome:<32} {count:6d}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 180)
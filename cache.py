@@ -0,0 +1,231 @@
+import hashlib
+import os
+import threading
+import time
+
+# Which store to use:
+#   memory - per-process dictionary (default, fine for a single worker)
+#   disk   - diskcache directory shared by every worker process on this machine;
+#            CACHE_DIR must be set (serve.py creates a private one)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_DIR = os.environ.get('CACHE_DIR')
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))
+
+# Lifetimes in seconds
+AUTH_TTL = int(os.environ.get('CACHE_AUTH_TTL', '300'))
+CALENDARS_TTL = int(os.environ.get('CACHE_CALENDARS_TTL', '300'))
+EVENTS_TTL = int(os.environ.get('CACHE_EVENTS_TTL', '60'))
+
+
+class MemoryBackend:
+    """
+    Cache kept in this process only; every worker has its own copy
+
+    With max_entries=None nothing is ever evicted: entries only go away once
+    their TTL has run out.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._sweep_at = 1024  # size at which an unbounded store next drops expired entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, tag, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl, tag=None):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + ttl, tag, value)
+            self._check_size()
+
+    def get_many(self, keys):
+        """Return the values of several keys (None for missing ones) in one step"""
+        with self._lock:
+            now = time.monotonic()
+            values = []
+            for key in keys:
+                entry = self._data.get(key)
+                values.append(entry[2] if entry is not None and entry[0] >= now else None)
+            return values
+
+    def update(self, keys, func, ttl):
+        """Atomically replace the value of each key with func(current value or None)"""
+        with self._lock:
+            now = time.monotonic()
+            for key in keys:
+                entry = self._data.pop(key, None)
+                current = entry[2] if entry is not None and entry[0] >= now else None
+                self._data[key] = (now + ttl, None, func(current))
+            self._check_size()
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def evict(self, tag):
+        """Remove every entry stored with the given tag"""
+        with self._lock:
+            for key in [k for k, (_, t, _) in self._data.items() if t == tag]:
+                del self._data[key]
+
+    def _check_size(self):
+        if self._max_entries is None:
+            # Unbounded: sweep expired entries whenever the store has doubled since the last sweep
+            if len(self._data) > self._sweep_at:
+                self._drop_expired()
+                self._sweep_at = max(1024, 2 * len(self._data))
+        elif len(self._data) > self._max_entries:
+            self._prune()
+
+    def _drop_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (expires, _, _) in self._data.items() if expires < now]:
+            del self._data[key]
+
+    def _prune(self):
+        # Drop expired entries first, then the oldest ones (dicts keep insertion order)
+        self._drop_expired()
+        while len(self._data) > self._max_entries:
+            del self._data[next(iter(self._data))]
+
+
+class DiskBackend:
+    """
+    Cache stored in a local diskcache directory, shared by all worker processes
+
+    With evict=False entries are never dropped to stay under the size limit,
+    only once their TTL has run out.
+    """
+
+    def __init__(self, directory, evict=True):
+        import diskcache  # only needed when this backend is selected
+        # Entries are pickles of users' calendar data, so the directory must be ours alone
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.stat(directory)
+        if info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise ValueError(f"CACHE_DIR {directory} must be owned by this user with mode 0700")
+        self._cache = diskcache.Cache(
+            directory,
+            tag_index=True,
+            size_limit=2 ** 28,
+            eviction_policy='least-recently-stored' if evict else 'none'
+        )
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl, tag=None):
+        self._cache.set(key, value, expire=ttl, tag=tag)
+
+    def get_many(self, keys):
+        """Return the values of several keys (None for missing ones) in one transaction"""
+        with self._cache.transact():
+            return [self._cache.get(key) for key in keys]
+
+    def update(self, keys, func, ttl):
+        """Atomically replace the value of each key with func(current value or None)"""
+        with self._cache.transact():
+            for key in keys:
+                self._cache.set(key, func(self._cache.get(key)), expire=ttl)
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def evict(self, tag):
+        """Remove every entry stored with the given tag"""
+        self._cache.evict(tag)
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the process-wide cache backend, creating it on first use"""
+    global _backend
+    if _backend is None:
+        if CACHE_BACKEND == 'disk':
+            if not CACHE_DIR:
+                raise ValueError("CACHE_DIR must be set when CACHE_BACKEND=disk")
+            _backend = DiskBackend(CACHE_DIR)
+        elif CACHE_BACKEND == 'memory':
+            _backend = MemoryBackend()
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND: {CACHE_BACKEND}")
+    return _backend
+
+
+_state_backend = None
+
+
+def get_state_backend():
+    """
+    Return the process-wide store for job state and quota usage
+
+    Unlike the response cache this store never evicts to make room, so a burst
+    of cached event lists can't wipe out a running job or reset a usage counter.
+    With the disk backend it lives in a 'state' subdirectory of CACHE_DIR.
+    """
+    global _state_backend
+    if _state_backend is None:
+        if CACHE_BACKEND == 'disk':
+            if not CACHE_DIR:
+                raise ValueError("CACHE_DIR must be set when CACHE_BACKEND=disk")
+            _state_backend = DiskBackend(os.path.join(CACHE_DIR, 'state'), evict=False)
+        elif CACHE_BACKEND == 'memory':
+            _state_backend = MemoryBackend(max_entries=None)
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND: {CACHE_BACKEND}")
+    return _state_backend
+
+
+class UserCache:
+    """
+    Cache view scoped to one access token
+
+    Keys are derived from a hash of the token so raw tokens never end up in the store.
+    """
+
+    def __init__(self, token, backend=None):
+        self.key = hashlib.sha256(token.encode()).hexdigest()
+        self.backend = backend or get_backend()
+
+    def is_validated(self):
+        return self.backend.get((self.key, 'auth')) is not None
+
+    def mark_validated(self):
+        self.backend.set((self.key, 'auth'), True, AUTH_TTL)
+
+    def get_calendars(self):
+        return self.backend.get((self.key, 'calendars'))
+
+    def set_calendars(self, calendars):
+        self.backend.set((self.key, 'calendars'), calendars, CALENDARS_TTL)
+
+    def get_events(self, calendar_id, time_min, time_max):
+        return self.backend.get((self.key, 'events', calendar_id, time_min, time_max))
+
+    def set_events(self, calendar_id, time_min, time_max, events):
+        self.backend.set(
+            (self.key, 'events', calendar_id, time_min, time_max),
+            events,
+            EVENTS_TTL,
+            tag=self.key + ':events'
+        )
+
+    def invalidate_calendars(self):
+        """Forget the calendar list, e.g. after a calendar was created"""
+        self.backend.delete((self.key, 'calendars'))
+
+    def invalidate_events(self):
+        """Forget all cached event data for this user, e.g. after a write"""
+        self.backend.evict(self.key + ':events')
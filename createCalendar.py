@@ -1,10 +1,7 @@
-import os
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from batch import execute_batch
+
 def create_calendar(service, calendar_name, description=""):
     """
     Create a new calendar
@@ -38,4 +35,98 @@ def create_calendar(service, calendar_name, description=""):
             'success': False,
             'error': str(error),
             'message': 'Failed to create calendar'
-        }
\ No newline at end of file
+        }
+
+
+def provision_calendars(service, calendars, progress=None):
+    """
+    Create several calendars, then apply their colors and sharing rules
+
+    Calendars are inserted in one batch, and color/ACL changes for all of them in a second batch.
+
+    Args:
+        service: Google Calendar service object
+        calendars: List of dicts with calendar_name, description (optional),
+                   color_id (optional, Google calendar color id) and
+                   acl (optional list of {'email': ..., 'role': ...})
+        progress: Called as progress(done, total) as calls complete (optional)
+
+    Returns:
+        Dictionary with per-calendar results
+    """
+    total = len(calendars) + sum(
+        (1 if spec.get('color_id') else 0) + len(spec.get('acl') or []) for spec in calendars
+    )
+    done = 0
+    results = [{
+        'calendar_name': spec['calendar_name'],
+        'calendar_id': None,
+        'success': False,
+        'errors': []
+    } for spec in calendars]
+
+    def step(index, response, error):
+        nonlocal done
+        done += 1
+        if error is not None:
+            results[index]['errors'].append(str(error))
+        if progress:
+            progress(done, total)
+
+    if progress:
+        progress(0, total)
+
+    # Step 1: create every calendar
+    inserts = [
+        service.calendars().insert(body={
+            'summary': spec['calendar_name'],
+            'description': spec.get('description') or '',
+            'timeZone': 'America/New_York'  # Change to your timezone
+        })
+        for spec in calendars
+    ]
+    for index, (created, error) in enumerate(execute_batch(service, inserts, step)):
+        if error is None:
+            results[index]['calendar_id'] = created['id']
+            results[index]['success'] = True
+
+    # Step 2: colors and sharing for the calendars that were created
+    requests = []
+    owners = []
+    for index, spec in enumerate(calendars):
+        calendar_id = results[index]['calendar_id']
+        if calendar_id is None:
+            continue
+        if spec.get('color_id'):
+            requests.append(service.calendarList().patch(
+                calendarId=calendar_id,
+                body={'colorId': spec['color_id']}
+            ))
+            owners.append(index)
+        for rule in spec.get('acl') or []:
+            requests.append(service.acl().insert(
+                calendarId=calendar_id,
+                body={
+                    'role': rule.get('role') or 'reader',
+                    'scope': {'type': 'user', 'value': rule['email']}
+                }
+            ))
+            owners.append(index)
+
+    # Calendars that failed to create have nothing left to configure
+    total = len(calendars) + len(requests)
+
+    def step_for_calendar(position, response, error):
+        index = owners[position]
+        if error is not None:
+            results[index]['success'] = False
+        step(index, response, error)
+
+    execute_batch(service, requests, step_for_calendar)
+
+    created_count = sum(1 for result in results if result['success'])
+    return {
+        'success': created_count == len(calendars),
+        'calendars': results,
+        'message': f'Provisioned {created_count} of {len(calendars)} calendars'
+    }
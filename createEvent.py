@@ -1,8 +1,3 @@
-import os
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 def add_event(service, title, start_datetime, end_datetime, description="", calendar_id='primary'):
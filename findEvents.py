@@ -1,16 +1,86 @@
-import os
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from datetime import datetime, timedelta
+from fastapi import HTTPException
+from dataclasses import dataclass
+from datetime import datetime
+from operator import attrgetter
 from typing import List, Dict, Any
 import pytz  # You'll need to install this: pip install pytz
 
-def find_events_by_date(service, date_str: str) -> Dict[str, Any]:
+
+@dataclass(slots=True)
+class EventRecord:
+    """
+    One event in a find result
+
+    Slotted so thousands of them stay small in memory, and serialized directly
+    by orjson (field order here is the JSON key order).
+    """
+    title: str
+    start_time: str
+    end_time: str
+    calendar: str
+    calendar_id: str
+    event_id: str
+    description: str
+    location: str
+    status: str
+    created: str
+    updated: str
+
+
+def get_calendars(service, user_cache=None) -> List[Dict[str, Any]]:
+    """
+    Get the user's calendar list, from the cache when possible
+    """
+    calendars = user_cache.get_calendars() if user_cache is not None else None
+    if calendars is None:
+        calendar_list = service.calendarList().list().execute()
+        calendars = calendar_list.get('items', [])
+        if user_cache is not None:
+            user_cache.set_calendars(calendars)
+    return calendars
+
+
+def list_calendar_events(service, calendar_id, time_min, time_max, user_cache=None) -> List[Dict[str, Any]]:
+    """
+    Get all events of one calendar between two RFC3339 times, from the cache when possible
+
+    Follows nextPageToken, so ranges longer than a day aren't cut off at one page.
+    """
+    events = user_cache.get_events(calendar_id, time_min, time_max) if user_cache is not None else None
+    if events is not None:
+        return events
+    
+    events = []
+    page_token = None
+    while True:
+        # Query events for this calendar
+        events_result = service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            singleEvents=True,
+            orderBy='startTime',
+            showDeleted=False,  # Don't include deleted events
+            maxResults=2500,
+            pageToken=page_token
+        ).execute()
+        
+        events.extend(events_result.get('items', []))
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            break
+    
+    if user_cache is not None:
+        user_cache.set_events(calendar_id, time_min, time_max, events)
+    return events
+
+
+def find_events_by_date(service, date_str: str, user_cache=None) -> Dict[str, Any]:
     """
     Find all events on a specific date across all calendars
+
+    If a user_cache is given, the calendar list and per-calendar event lists
+    are read from / written to it instead of always calling Google.
     """
     try:
         print(f"=== FINDING EVENTS FOR DATE: {date_str} ===")
@@ -43,8 +113,7 @@ def find_events_by_date(service, date_str: str) -> Dict[str, Any]:
         print(f"UTC time range: {start_time} to {end_time}")
         
         # Get list of all calendars
-        calendar_list = service.calendarList().list().execute()
-        calendars = calendar_list.get('items', [])
+        calendars = get_calendars(service, user_cache)
         print(f"Found {len(calendars)} calendars to search")
         
         all_events = []
@@ -56,17 +125,7 @@ def find_events_by_date(service, date_str: str) -> Dict[str, Any]:
             print(f"Searching calendar: {calendar_name} ({calendar_id})")
             
             try:
-                # Query events for this calendar
-                events_result = service.events().list(
-                    calendarId=calendar_id,
-                    timeMin=start_time,
-                    timeMax=end_time,
-                    singleEvents=True,
-                    orderBy='startTime',
-                    showDeleted=False  # Don't include deleted events
-                ).execute()
-                
-                events = events_result.get('items', [])
+                events = list_calendar_events(service, calendar_id, start_time, end_time, user_cache)
                 print(f"Found {len(events)} events in {calendar_name}")
                 
                 # Process each event
@@ -122,19 +181,19 @@ def find_events_by_date(service, date_str: str) -> Dict[str, Any]:
                         end_display = "Unknown Time"
                     
                     # Add to results
-                    event_data = {
-                        'title': title,
-                        'start_time': start_display,
-                        'end_time': end_display,
-                        'calendar': calendar_name,
-                        'calendar_id': calendar_id,
-                        'event_id': event_id,
-                        'description': event.get('description', ''),
-                        'location': event.get('location', ''),
-                        'status': event.get('status', 'confirmed'),
-                        'created': event.get('created', ''),
-                        'updated': event.get('updated', '')
-                    }
+                    event_data = EventRecord(
+                        title=title,
+                        start_time=start_display,
+                        end_time=end_display,
+                        calendar=calendar_name,
+                        calendar_id=calendar_id,
+                        event_id=event_id,
+                        description=event.get('description', ''),
+                        location=event.get('location', ''),
+                        status=event.get('status', 'confirmed'),
+                        created=event.get('created', ''),
+                        updated=event.get('updated', '')
+                    )
                     
                     all_events.append(event_data)
                     print(f"  Added event: {event_data}")
@@ -144,11 +203,11 @@ def find_events_by_date(service, date_str: str) -> Dict[str, Any]:
                 continue
         
         # Sort events by start time
-        all_events.sort(key=lambda x: x['start_time'])
+        all_events.sort(key=attrgetter('start_time'))
         
         print(f"=== FINAL RESULT: Found {len(all_events)} events ===")
         for event in all_events:
-            print(f"  - {event['title']} ({event['start_time']} - {event['end_time']}) in {event['calendar']}")
+            print(f"  - {event.title} ({event.start_time} - {event.end_time}) in {event.calendar}")
         
         return {
             'message': f'Found {len(all_events)} events on {date_str}',
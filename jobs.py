@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import get_state_backend
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))
+JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL', '3600'))  # seconds
+JOB_USER_CONCURRENCY = int(os.environ.get('JOB_USER_CONCURRENCY', '2'))  # running jobs per user
+JOB_USER_MAX_PENDING = int(os.environ.get('JOB_USER_MAX_PENDING', '20'))  # waiting jobs per user
+
+FINISHED = ('succeeded', 'failed')
+
+_executor = None
+
+# Per-user bookkeeping for this process: how many jobs are running and which are waiting.
+# Limits are per worker process; across workers only the shared upstream quota applies.
+_lock = threading.Lock()
+_running = defaultdict(int)
+_pending = defaultdict(deque)
+
+
+class JobLimitError(Exception):
+    """Raised when a user already has too many jobs waiting"""
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='job')
+    return _executor
+
+
+class Job:
+    """
+    A background operation and its state
+
+    The state lives in the shared state store (which never evicts), so with
+    several workers any of them can answer a status poll, while the job itself
+    runs in the process that accepted it.
+    """
+
+    def __init__(self, owner, kind):
+        self.backend = get_state_backend()
+        self.state = {
+            'job_id': uuid.uuid4().hex,
+            'owner': owner,
+            'kind': kind,
+            'status': 'queued',
+            'progress': {'done': 0, 'total': None},
+            'result': None,
+            'error': None,
+            'created': time.time(),
+            'updated': time.time(),
+            'version': 0
+        }
+        self._save()
+
+    @property
+    def job_id(self):
+        return self.state['job_id']
+
+    def set_progress(self, done, total=None):
+        """Progress callback handed to the operation"""
+        self.state['progress'] = {
+            'done': done,
+            'total': total if total is not None else self.state['progress']['total']
+        }
+        self._save()
+
+    def _run(self, func):
+        self.state['status'] = 'running'
+        self._save()
+        try:
+            self.state['result'] = func(self)
+            self.state['status'] = 'succeeded'
+        except Exception as e:
+            print(f"Job {self.job_id} ({self.state['kind']}) failed: {e}")
+            self.state['error'] = str(getattr(e, 'detail', e))
+            self.state['status'] = 'failed'
+        finally:
+            try:
+                self._save()
+            finally:
+                # Release the slot even if the state couldn't be written,
+                # or the user's queued jobs would never start
+                _finished(self.state['owner'])
+
+    def _save(self):
+        self.state['updated'] = time.time()
+        self.state['version'] += 1
+        self.backend.set(('job', self.job_id), self.state, JOB_RESULT_TTL)
+
+
+def _dispatch(job, func):
+    _running[job.state['owner']] += 1
+    _get_executor().submit(job._run, func)
+
+
+def _finished(owner):
+    """Free the owner's slot and start their next waiting job, if any"""
+    with _lock:
+        _running[owner] -= 1
+        if _pending[owner]:
+            _dispatch(*_pending[owner].popleft())
+        if not _running[owner]:
+            del _running[owner]
+        if not _pending[owner]:
+            del _pending[owner]
+
+
+def submit_job(owner, kind, func):
+    """
+    Run func(job) in the background
+
+    Each user runs at most JOB_USER_CONCURRENCY jobs at once; further jobs wait
+    in a per-user queue so one user can't take every worker thread.
+
+    Args:
+        owner: Key of the user the job belongs to (UserCache.key)
+        kind: Short name of the operation, shown when polling
+        func: Callable taking the Job (for job.set_progress) and returning the result
+
+    Returns:
+        The job id to poll with get_job
+
+    Raises:
+        JobLimitError: if the user already has JOB_USER_MAX_PENDING jobs waiting
+    """
+    with _lock:
+        if len(_pending[owner]) >= JOB_USER_MAX_PENDING:
+            raise JobLimitError(f"Too many pending jobs (limit {JOB_USER_MAX_PENDING})")
+        job = Job(owner, kind)
+        if _running[owner] < JOB_USER_CONCURRENCY:
+            _dispatch(job, func)
+        else:
+            _pending[owner].append((job, func))
+    return job.job_id
+
+
+def get_job(job_id, owner):
+    """Return the public state of a job, or None if it doesn't exist or belongs to someone else"""
+    state = get_state_backend().get(('job', job_id))
+    if state is None or state['owner'] != owner:
+        return None
+    return {key: value for key, value in state.items() if key != 'owner'}
@@ -1,26 +1,57 @@
-from fastapi import FastAPI, HTTPException, Depends, Header
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from contextlib import asynccontextmanager
+from functools import partial
+import time
 import os
-from google.auth.transport.requests import Request
+import asyncio
+import json
+import orjson
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-import logging
+from googleapiclient.discovery import build_from_document
 
 # Import your existing functions
 from createEvent import add_event
-from createCalendar import create_calendar  
-from moveEvent import move_event_by_title, find_event_by_title_and_time
+from createCalendar import create_calendar, provision_calendars
+from moveEvent import move_event_by_title, transfer_events
 from findEvents import find_events_by_date
 from delete import delete_event_by_title
+from cache import UserCache, get_backend, get_state_backend
+from scheduleTasks import schedule_tasks
+from quota import AccountedHttpRequest, QuotaExceeded, get_controller, ADMISSION_QUEUE_TIMEOUT
+from jobs import submit_job, get_job, JobLimitError, FINISHED
 
 # Create security scheme
 security = HTTPBearer()
 
-app = FastAPI(title="Google Calendar API", version="1.0.0")
+_discovery_document = None
+
+def get_discovery_document():
+    """
+    Load the Calendar v3 discovery document once per process
+
+    build() would read and parse this large JSON file on every request; building
+    from the already-parsed document skips that.
+    """
+    global _discovery_document
+    if _discovery_document is None:
+        from googleapiclient.discovery_cache import get_static_doc
+        _discovery_document = json.loads(get_static_doc('calendar', 'v3'))
+    return _discovery_document
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm everything the first request would otherwise pay for
+    get_discovery_document()
+    get_backend()
+    get_state_backend()
+    yield
+
+app = FastAPI(title="Google Calendar API", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -65,8 +96,80 @@ class DeleteEventRequest(BaseModel):
     start_datetime: str
     calendar_id: Optional[str] = 'primary'
 
+class AclRule(BaseModel):
+    email: str
+    role: Optional[str] = 'reader'  # reader, writer or owner
+
+class CalendarSpec(BaseModel):
+    calendar_name: str
+    description: Optional[str] = ""
+    color_id: Optional[str] = None  # Google calendar color id, e.g. '7'
+    acl: List[AclRule] = []
+
+class ProvisionCalendarsRequest(BaseModel):
+    calendars: List[CalendarSpec]
+
+class TransferEventItem(BaseModel):
+    title: str
+    start_datetime: str
+
+class TransferEventsRequest(BaseModel):
+    events: List[TransferEventItem]
+    destination_calendar_id: str
+    source_calendar_id: Optional[str] = 'primary'
+    mode: Literal['move', 'copy'] = 'move'
+
+class ScheduleTaskItem(BaseModel):
+    title: str
+    duration_minutes: int = Field(gt=0)
+    priority: int = 0  # higher is placed first
+    deadline: Optional[str] = None  # latest end, ex: '2024-01-15T17:00:00'
+    not_before: Optional[str] = None  # earliest start, ex: '2024-01-15T09:00:00'
+    description: Optional[str] = ""
+
+class ScheduleRequest(BaseModel):
+    tasks: List[ScheduleTaskItem]
+    start_date: str  # YYYY-MM-DD format
+    end_date: str  # YYYY-MM-DD format, inclusive
+    working_hours_start: str = '09:00'
+    working_hours_end: str = '17:00'
+    working_days: List[int] = [0, 1, 2, 3, 4]  # Monday=0
+    buffer_minutes: int = Field(default=0, ge=0)
+    # Calendars whose events block time; defaults to those the user owns or can write to
+    busy_calendar_ids: Optional[List[str]] = None
+    commit: bool = False
+    calendar_id: Optional[str] = 'primary'
+
+# Response models for /events/find. They document the schema; the endpoint returns
+# an ORJSONResponse directly so results skip validation and jsonable_encoder.
+class EventOut(BaseModel):
+    title: str
+    start_time: str
+    end_time: str
+    calendar: str
+    calendar_id: str
+    event_id: str
+    description: str
+    location: str
+    status: str
+    created: str
+    updated: str
+
+class SearchParams(BaseModel):
+    start_time: str
+    end_time: str
+    calendars_searched: int
+    timezone_used: str
+
+class FindEventsResponse(BaseModel):
+    message: str
+    date: str
+    total_events: int
+    events: List[EventOut]
+    search_params: SearchParams
+
 # Modified authentication function for mobile tokens
-def authenticate_with_token(access_token: str):
+def authenticate_with_token(access_token: str, user_cache: Optional[UserCache] = None):
     """Authenticate using access token from mobile app"""
     try:
         print(f"Authenticating with token: {access_token[:20]}...")
@@ -81,14 +184,25 @@ def authenticate_with_token(access_token: str):
             client_secret=None
         )
         
-        # Build the service
-        service = build('calendar', 'v3', credentials=creds)
+        # Build the service; every call it makes is charged to this token's quota
+        service = build_from_document(
+            get_discovery_document(),
+            credentials=creds,
+            requestBuilder=partial(AccountedHttpRequest, owner=user_cache.key if user_cache else None)
+        )
+        
+        # Skip the validation call if this token was verified recently (by any worker)
+        if user_cache is not None and user_cache.is_validated():
+            return service
         
         # Test the credentials by making a simple API call
         try:
             # Try to get calendar list to verify the token works
             calendars_result = service.calendarList().list().execute()
             print(f"Authentication successful, found {len(calendars_result.get('items', []))} calendars")
+            if user_cache is not None:
+                user_cache.mark_validated()
+                user_cache.set_calendars(calendars_result.get('items', []))
         except Exception as test_error:
             print(f"Token validation failed: {test_error}")
             raise HTTPException(status_code=401, detail=f"Invalid or expired token: {str(test_error)}")
@@ -100,32 +214,82 @@ def authenticate_with_token(access_token: str):
         print(f"Authentication error: {e}")
         raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
 
+# Dependency to get the per-token cache view from authorization header
+async def get_user_cache(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Extract token from Authorization header and return its cache view"""
+    return UserCache(credentials.credentials)
+
+# Dependency factory for admission control, run before any upstream call is made
+def admit(priority: str):
+    """
+    Admit the request, wait up to ADMISSION_QUEUE_TIMEOUT for load to ease, or reject with 429
+
+    priority is 'high' (single writes), 'normal' (jobs, scheduling) or 'low' (read fan-outs).
+    """
+    async def dependency(user_cache: UserCache = Depends(get_user_cache)):
+        controller = get_controller()
+        deadline = time.monotonic() + ADMISSION_QUEUE_TIMEOUT
+        while True:
+            try:
+                controller.check(user_cache.key, priority)
+                return
+            except QuotaExceeded as e:
+                remaining = deadline - time.monotonic()
+                if e.final or remaining <= 0:
+                    print(f"Rejected {priority} request: {e}")
+                    raise HTTPException(
+                        status_code=429,
+                        detail=str(e),
+                        headers={'Retry-After': str(e.retry_after)}
+                    )
+                await asyncio.sleep(min(0.25, remaining))
+    return dependency
+
 # Dependency to get service from authorization header
-async def get_calendar_service(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_calendar_service(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user_cache: UserCache = Depends(get_user_cache)
+):
     """Extract token from Authorization header and create service"""
     token = credentials.credentials
-    return authenticate_with_token(token)
+    return authenticate_with_token(token, user_cache)
 
 @app.get("/")
 async def root():
     return {"message": "Google Calendar API Server is running"}
 
-@app.post("/calendar/create")
+@app.get("/ready")
+async def ready():
+    """Readiness check: discovery document loaded and cache and job stores answering"""
+    if _discovery_document is None:
+        raise HTTPException(status_code=503, detail="Discovery document not loaded")
+    try:
+        get_backend().get(('ready',))
+        get_state_backend().get(('ready',))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Cache backend unavailable: {str(e)}")
+    return {"ready": True}
+
+@app.post("/calendar/create", dependencies=[Depends(admit("high"))])
 async def create_calendar_endpoint(
     request: CreateCalendarRequest,
-    service = Depends(get_calendar_service)
+    service = Depends(get_calendar_service),
+    user_cache: UserCache = Depends(get_user_cache)
 ):
     """Create a new calendar"""
     try:
         result = create_calendar(service, request.calendar_name, request.description)
+        if result.get('success'):
+            user_cache.invalidate_calendars()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/event/create")
+@app.post("/event/create", dependencies=[Depends(admit("high"))])
 async def create_event_endpoint(
     request: CreateEventRequest,
-    service = Depends(get_calendar_service)
+    service = Depends(get_calendar_service),
+    user_cache: UserCache = Depends(get_user_cache)
 ):
     """Create a new event"""
     try:
@@ -137,14 +301,17 @@ async def create_event_endpoint(
             request.description,
             request.calendar_id
         )
+        if result.get('success'):
+            user_cache.invalidate_events()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/event/move")
+@app.post("/event/move", dependencies=[Depends(admit("high"))])
 async def move_event_endpoint(
     request: MoveEventRequest,
-    service = Depends(get_calendar_service)
+    service = Depends(get_calendar_service),
+    user_cache: UserCache = Depends(get_user_cache)
 ):
     """Move an existing event"""
     try:
@@ -156,14 +323,17 @@ async def move_event_endpoint(
             request.new_end_datetime,
             request.calendar_id
         )
+        if result.get('success'):
+            user_cache.invalidate_events()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/event/delete")
+@app.post("/event/delete", dependencies=[Depends(admit("high"))])
 async def delete_event_endpoint(
     request: DeleteEventRequest,
-    service = Depends(get_calendar_service)
+    service = Depends(get_calendar_service),
+    user_cache: UserCache = Depends(get_user_cache)
 ):
     """Delete an existing event"""
     try:
@@ -173,25 +343,205 @@ async def delete_event_endpoint(
             request.start_datetime,
             request.calendar_id
         )
+        if result.get('success'):
+            user_cache.invalidate_events()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/events/find")
+@app.post("/events/find", response_model=FindEventsResponse, response_class=ORJSONResponse, dependencies=[Depends(admit("low"))])
 async def find_events_endpoint(
     request: FindEventsRequest,
-    service = Depends(get_calendar_service)
+    service = Depends(get_calendar_service),
+    user_cache: UserCache = Depends(get_user_cache)
 ):
     """Find all events on a specific date across all calendars"""
     try:
-        result = find_events_by_date(service, request.date)
-        return result
+        result = find_events_by_date(service, request.date, user_cache)
+        return ORJSONResponse(result)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/schedule", dependencies=[Depends(admit("normal"))])
+async def schedule_endpoint(
+    request: ScheduleRequest,
+    service = Depends(get_calendar_service),
+    user_cache: UserCache = Depends(get_user_cache)
+):
+    """Place tasks into free time across all calendars, optionally creating the events"""
+    try:
+        result = schedule_tasks(
+            service,
+            [task.model_dump() for task in request.tasks],
+            request.start_date,
+            request.end_date,
+            request.working_hours_start,
+            request.working_hours_end,
+            request.working_days,
+            request.buffer_minutes,
+            request.commit,
+            request.calendar_id,
+            user_cache,
+            request.busy_calendar_ids
+        )
+        if request.commit:
+            user_cache.invalidate_events()
+        return ORJSONResponse(result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid schedule request: {str(e)}. Use YYYY-MM-DD, HH:MM and '2024-01-15T09:00:00' formats.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+JOB_STREAM_INTERVAL = float(os.environ.get('JOB_STREAM_INTERVAL', '0.5'))  # seconds between SSE polls
+
+def start_job(user_cache: UserCache, kind: str, run):
+    """Submit a background job for this user and return the 202 response body"""
+    try:
+        job_id = submit_job(user_cache.key, kind, run)
+    except JobLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {'job_id': job_id, 'status': 'queued'}
+
+@app.post("/calendars/provision", status_code=202, dependencies=[Depends(admit("normal"))])
+async def provision_calendars_endpoint(
+    request: ProvisionCalendarsRequest,
+    service = Depends(get_calendar_service),
+    user_cache: UserCache = Depends(get_user_cache)
+):
+    """Create several calendars with colors and sharing rules as a background job"""
+    specs = [spec.model_dump() for spec in request.calendars]
+
+    def run(job):
+        try:
+            return provision_calendars(service, specs, progress=job.set_progress)
+        finally:
+            user_cache.invalidate_calendars()
+
+    return start_job(user_cache, 'provision_calendars', run)
+
+@app.post("/events/transfer", status_code=202, dependencies=[Depends(admit("normal"))])
+async def transfer_events_endpoint(
+    request: TransferEventsRequest,
+    service = Depends(get_calendar_service),
+    user_cache: UserCache = Depends(get_user_cache)
+):
+    """Move or copy events into another calendar as a background job"""
+    items = [item.model_dump() for item in request.events]
+
+    def run(job):
+        try:
+            return transfer_events(
+                service,
+                items,
+                request.source_calendar_id,
+                request.destination_calendar_id,
+                request.mode,
+                progress=job.set_progress
+            )
+        finally:
+            user_cache.invalidate_events()
+
+    return start_job(user_cache, 'transfer_events', run)
+
+@app.get("/jobs/{job_id}")
+async def get_job_endpoint(
+    job_id: str,
+    user_cache: UserCache = Depends(get_user_cache)
+):
+    """Poll the status, progress and result of a background job"""
+    job = get_job(job_id, user_cache.key)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return ORJSONResponse(job)
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job_endpoint(
+    job_id: str,
+    user_cache: UserCache = Depends(get_user_cache)
+):
+    """Stream a background job's state as server-sent events until it finishes"""
+    if get_job(job_id, user_cache.key) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    async def events():
+        last_version = None
+        while True:
+            job = get_job(job_id, user_cache.key)
+            if job is None:
+                yield "event: expired\ndata: {}\n\n"
+                return
+            if job['version'] != last_version:
+                last_version = job['version']
+                yield f"event: {job['status']}\ndata: {orjson.dumps(job).decode()}\n\n"
+            if job['status'] in FINISHED:
+                return
+            await asyncio.sleep(JOB_STREAM_INTERVAL)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.post("/jobs/events/find", status_code=202, dependencies=[Depends(admit("low"))])
+async def find_events_job_endpoint(
+    request: FindEventsRequest,
+    service = Depends(get_calendar_service),
+    user_cache: UserCache = Depends(get_user_cache)
+):
+    """Same as /events/find, run as a background job"""
+    return start_job(
+        user_cache,
+        'find_events',
+        lambda job: find_events_by_date(service, request.date, user_cache)
+    )
+
+@app.post("/jobs/event/move", status_code=202, dependencies=[Depends(admit("normal"))])
+async def move_event_job_endpoint(
+    request: MoveEventRequest,
+    service = Depends(get_calendar_service),
+    user_cache: UserCache = Depends(get_user_cache)
+):
+    """Same as /event/move, run as a background job"""
+    def run(job):
+        result = move_event_by_title(
+            service,
+            request.title,
+            request.current_start_datetime,
+            request.new_start_datetime,
+            request.new_end_datetime,
+            request.calendar_id
+        )
+        if result.get('success'):
+            user_cache.invalidate_events()
+        return result
+
+    return start_job(user_cache, 'move_event', run)
+
+@app.post("/jobs/event/delete", status_code=202, dependencies=[Depends(admit("normal"))])
+async def delete_event_job_endpoint(
+    request: DeleteEventRequest,
+    service = Depends(get_calendar_service),
+    user_cache: UserCache = Depends(get_user_cache)
+):
+    """Same as /event/delete, run as a background job"""
+    def run(job):
+        result = delete_event_by_title(
+            service,
+            request.title,
+            request.start_datetime,
+            request.calendar_id
+        )
+        if result.get('success'):
+            user_cache.invalidate_events()
+        return result
+
+    return start_job(user_cache, 'delete_event', run)
+
 
 if __name__ == "__main__":
+    # Single-process development server; use serve.py for multi-worker production runs
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,10 +1,26 @@
-import os
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from batch import execute_batch
+
+
+def strip_timezone(event_start):
+    """
+    Extract just the date and time part of a Google dateTime (ignore timezone)
+
+    Format: 2025-12-15T09:00:00-05:00 -> 2025-12-15T09:00:00
+    """
+    if 'T' in event_start:
+        # Find the last occurrence of + or - (for timezone)
+        if '+' in event_start:
+            return event_start.split('+')[0]
+        elif event_start.count('-') > 2:  # More than 2 dashes means timezone
+            # Find last dash that's part of timezone (not date)
+            parts = event_start.split('-')
+            return '-'.join(parts[:-1])  # Everything except last part
+        else:
+            return event_start.split('Z')[0]
+    return event_start
+
 
 def find_event_by_title_and_time(service, title, start_datetime, calendar_id='primary'):
     """
@@ -47,20 +63,7 @@ def find_event_by_title_and_time(service, title, start_datetime, calendar_id='pr
             
             print(f"Checking event: '{event_title}' at {event_start}")
             
-            # Extract just the date and time part (ignore timezone)
-            # Format: 2025-12-15T09:00:00-05:00
-            if 'T' in event_start:
-                # Find the last occurrence of + or - (for timezone)
-                if '+' in event_start:
-                    event_start_clean = event_start.split('+')[0]
-                elif event_start.count('-') > 2:  # More than 2 dashes means timezone
-                    # Find last dash that's part of timezone (not date)
-                    parts = event_start.split('-')
-                    event_start_clean = '-'.join(parts[:-1])  # Everything except last part
-                else:
-                    event_start_clean = event_start.split('Z')[0]
-            else:
-                event_start_clean = event_start
+            event_start_clean = strip_timezone(event_start)
             
             print(f"Comparing '{title.lower()}' with '{event_title.lower()}'")
             print(f"Comparing times: '{start_datetime}' with '{event_start_clean}'")
@@ -152,4 +155,132 @@ def move_event(service, event_id, new_start_datetime, new_end_datetime, calendar
             'success': False,
             'error': str(error),
             'message': 'Failed to move event'
-        }
\ No newline at end of file
+        }
+
+# Fields kept when copying an event into another calendar. IDs, links and
+# organizer data belong to the source event and are regenerated by Google.
+COPY_FIELDS = ('summary', 'description', 'location', 'start', 'end',
+               'reminders', 'transparency', 'visibility', 'colorId')
+
+
+def transfer_events(service, events, source_calendar_id, destination_calendar_id, mode='move', progress=None):
+    """
+    Move or copy several events from one calendar to another
+
+    Events are located with one listing per day of the source calendar, then
+    moved with events().move() (keeping their ID and attendees) or copied as
+    fresh inserts. All calls are sent in batches.
+
+    Args:
+        service: Google Calendar service object
+        events: List of dicts with title and start_datetime ('2024-01-15T09:00:00')
+        source_calendar_id: Calendar the events are in now
+        destination_calendar_id: Calendar to move/copy them to
+        mode: 'move' or 'copy'
+        progress: Called as progress(done, total) as calls complete (optional)
+
+    Returns:
+        Dictionary with per-event results
+    """
+    # One listing per day covers every event looked up on that day
+    dates = sorted({item['start_datetime'].split('T')[0] for item in events})
+    total = len(dates) + len(events)  # day listings + one move/insert per event
+    done = 0
+
+    def advance():
+        nonlocal done
+        done += 1
+        if progress:
+            progress(done, total)
+
+    if progress:
+        progress(0, total)
+
+    listings = [
+        service.events().list(
+            calendarId=source_calendar_id,
+            timeMin=date + 'T00:00:00-05:00',
+            timeMax=date + 'T23:59:59-05:00',
+            singleEvents=True,
+            orderBy='startTime',
+            maxResults=2500
+        )
+        for date in dates
+    ]
+    day_events = {}
+    for date, (response, error) in zip(dates, execute_batch(service, listings, lambda i, r, e: advance())):
+        day_events[date] = (response or {}).get('items', []), error
+
+    results = []
+    matches = []  # full source event for each result, used when copying
+    for item in events:
+        listed, error = day_events[item['start_datetime'].split('T')[0]]
+        match = next((
+            event for event in listed
+            if event.get('summary', '').lower() == item['title'].lower()
+            and strip_timezone(event['start'].get('dateTime', '')) == item['start_datetime']
+        ), None)
+        if error is not None:
+            message = str(error)
+        elif match is None:
+            message = f'No event found with title "{item["title"]}" at time {item["start_datetime"]}'
+        else:
+            message = None
+        results.append({
+            'title': item['title'],
+            'start_datetime': item['start_datetime'],
+            'event_id': match.get('id') if match else None,
+            'success': match is not None,
+            'message': message
+        })
+        matches.append(match)
+
+    found = [index for index, result in enumerate(results) if result['success']]
+    # Events that weren't found have no further calls to wait for
+    total = len(dates) + len(found)
+    if progress:
+        progress(done, total)
+
+    def record(result, error):
+        if error is not None:
+            result['success'] = False
+            result['message'] = str(error)
+        advance()
+
+    if mode == 'move':
+        requests = [
+            service.events().move(
+                calendarId=source_calendar_id,
+                eventId=results[index]['event_id'],
+                destination=destination_calendar_id
+            )
+            for index in found
+        ]
+
+        execute_batch(service, requests, lambda i, response, error: record(results[found[i]], error))
+    else:
+        requests = [
+            service.events().insert(
+                calendarId=destination_calendar_id,
+                body={key: matches[index][key] for key in COPY_FIELDS if key in matches[index]}
+            )
+            for index in found
+        ]
+
+        def record_copy(i, response, error):
+            if error is None:
+                results[found[i]]['new_event_id'] = response.get('id')
+            record(results[found[i]], error)
+
+        execute_batch(service, requests, record_copy)
+
+    succeeded = sum(1 for result in results if result['success'])
+    verb = 'Moved' if mode == 'move' else 'Copied'
+    return {
+        'success': succeeded == len(events),
+        'mode': mode,
+        'source_calendar_id': source_calendar_id,
+        'destination_calendar_id': destination_calendar_id,
+        'events': results,
+        'message': f'{verb} {succeeded} of {len(events)} events to {destination_calendar_id}'
+    }
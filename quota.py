@@ -0,0 +1,196 @@
+import json
+import math
+import os
+import threading
+import time
+
+from googleapiclient.http import HttpRequest
+
+from cache import get_state_backend
+
+# Usage is counted in cost units over a sliding window made of fixed buckets
+QUOTA_WINDOW = int(os.environ.get('QUOTA_WINDOW', '60'))  # seconds
+QUOTA_BUCKETS = int(os.environ.get('QUOTA_BUCKETS', '12'))
+QUOTA_USER_LIMIT = int(os.environ.get('QUOTA_USER_LIMIT', '600'))  # units per window per token
+QUOTA_PROJECT_LIMIT = int(os.environ.get('QUOTA_PROJECT_LIMIT', '6000'))  # units per window for everyone
+
+# Share of the project limit at which each priority starts being shed ('high' only at 100%)
+SHED_LOW_AT = float(os.environ.get('QUOTA_SHED_LOW_AT', '0.7'))
+SHED_NORMAL_AT = float(os.environ.get('QUOTA_SHED_NORMAL_AT', '0.9'))
+
+# Upstream latency (smoothed, seconds) at which each priority starts being shed
+LATENCY_SHED_LOW = float(os.environ.get('LATENCY_SHED_LOW', '1.5'))
+LATENCY_SHED_NORMAL = float(os.environ.get('LATENCY_SHED_NORMAL', '4.0'))
+LATENCY_HALF_LIFE = float(os.environ.get('LATENCY_HALF_LIFE', '10'))  # old samples fade if no calls go out
+LATENCY_RETRY_AFTER = int(os.environ.get('LATENCY_RETRY_AFTER', '5'))
+
+# How long a request may wait for pressure to ease before it is shed
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '2.0'))
+
+# Cost of one upstream call. Writes count double by default; QUOTA_METHOD_WEIGHTS
+# (JSON, e.g. '{"calendar.events.list": 3}') overrides individual method ids.
+DEFAULT_WEIGHT = 1
+WRITE_WEIGHT = 2
+WRITE_VERBS = ('insert', 'update', 'patch', 'move', 'delete', 'quickAdd', 'import')
+METHOD_WEIGHTS = json.loads(os.environ.get('QUOTA_METHOD_WEIGHTS', '{}'))
+
+PROJECT = '*'  # owner key under which project-wide usage is counted
+
+
+def method_weight(method_id):
+    """Cost units charged for one call of a discovery method id like 'calendar.events.list'"""
+    if method_id in METHOD_WEIGHTS:
+        return METHOD_WEIGHTS[method_id]
+    if method_id and method_id.rsplit('.', 1)[-1] in WRITE_VERBS:
+        return WRITE_WEIGHT
+    return DEFAULT_WEIGHT
+
+
+class QuotaExceeded(Exception):
+    """Raised when a request is not admitted"""
+
+    def __init__(self, message, retry_after, final):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.final = final  # True if waiting a couple of seconds can't help
+
+
+class AdmissionController:
+    """
+    Per-user accounting of upstream calls and admission decisions
+
+    Usage lives in the state store as one {bucket: units} dict per owner, so
+    with the disk backend all workers see the same totals, and cache eviction
+    can't reset a counter. Latency is smoothed per process.
+    """
+
+    def __init__(self, backend=None, clock=time.time):
+        self.backend = backend or get_state_backend()
+        self.clock = clock
+        self.bucket_seconds = QUOTA_WINDOW / QUOTA_BUCKETS
+        self._latency = 0.0
+        self._latency_at = 0.0
+        self._lock = threading.Lock()
+
+    def record_call(self, owner, method_id, count=1):
+        """Charge count calls of method_id to owner and to the project"""
+        self.record_calls([(owner, method_id)] * count)
+
+    def record_calls(self, calls):
+        """Charge a list of (owner, method_id) calls, one backend update per owner"""
+        costs = {}
+        for owner, method_id in calls:
+            costs[owner] = costs.get(owner, 0) + method_weight(method_id)
+        current = int(self.clock() // self.bucket_seconds)
+
+        for owner, cost in costs.items():
+            def add(buckets, cost=cost):
+                # Each owner's usage is one {bucket: units} dict; buckets that left the window are dropped
+                kept = {b: n for b, n in (buckets or {}).items() if b > current - QUOTA_BUCKETS}
+                kept[current] = kept.get(current, 0) + cost
+                return kept
+            keys = [('quota', PROJECT)] if owner is None else [('quota', owner), ('quota', PROJECT)]
+            self.backend.update(keys, add, QUOTA_WINDOW)
+
+    def record_latency(self, seconds):
+        """Fold one upstream round-trip time into the smoothed latency"""
+        with self._lock:
+            self._latency = 0.8 * self.latency() + 0.2 * seconds
+            self._latency_at = self.clock()
+
+    def latency(self):
+        """Smoothed upstream latency, decaying towards zero while no calls are made"""
+        elapsed = self.clock() - self._latency_at
+        return self._latency * 0.5 ** (elapsed / LATENCY_HALF_LIFE)
+
+    def _in_window(self, buckets):
+        """[(bucket, units)] still inside the window, oldest first"""
+        oldest = int(self.clock() // self.bucket_seconds) - QUOTA_BUCKETS + 1
+        return sorted((b, n) for b, n in (buckets or {}).items() if b >= oldest)
+
+    def usage(self, owner):
+        """Cost units used by owner ('*' for the project) in the current window"""
+        return sum(n for _, n in self._in_window(self.backend.get(('quota', owner))))
+
+    def _retry_after(self, buckets, limit):
+        """Seconds until enough old buckets leave the window to bring usage under limit"""
+        excess = sum(count for _, count in buckets) - limit
+        for bucket, count in buckets:
+            excess -= count
+            if excess < 0:
+                leaves_at = (bucket + QUOTA_BUCKETS) * self.bucket_seconds
+                return max(1, math.ceil(leaves_at - self.clock()))
+        return QUOTA_WINDOW
+
+    def check(self, owner, priority='normal'):
+        """
+        Decide whether a request may go ahead
+
+        Reads the owner's and the project's usage with a single backend lookup.
+
+        Args:
+            owner: Key of the user making the request (UserCache.key)
+            priority: 'high', 'normal' or 'low'
+
+        Raises:
+            QuotaExceeded: with the Retry-After to send
+        """
+        user_buckets, project_buckets = (
+            self._in_window(buckets) for buckets in self.backend.get_many([('quota', owner), ('quota', PROJECT)])
+        )
+
+        if sum(n for _, n in user_buckets) >= QUOTA_USER_LIMIT:
+            raise QuotaExceeded(
+                f"Per-user quota of {QUOTA_USER_LIMIT} units per {QUOTA_WINDOW}s exceeded",
+                self._retry_after(user_buckets, QUOTA_USER_LIMIT),
+                final=True
+            )
+
+        shed_at = {'high': 1.0, 'normal': SHED_NORMAL_AT, 'low': SHED_LOW_AT}[priority]
+        limit = QUOTA_PROJECT_LIMIT * shed_at
+        if sum(n for _, n in project_buckets) >= limit:
+            raise QuotaExceeded(
+                f"Server is near its Google API quota; {priority} priority requests are paused",
+                self._retry_after(project_buckets, limit),
+                final=False
+            )
+
+        latency_limit = {'high': math.inf, 'normal': LATENCY_SHED_NORMAL, 'low': LATENCY_SHED_LOW}[priority]
+        if self.latency() >= latency_limit:
+            raise QuotaExceeded(
+                f"Google API is responding slowly; {priority} priority requests are paused",
+                LATENCY_RETRY_AFTER,
+                final=False
+            )
+
+
+_controller = None
+
+
+def get_controller():
+    """Return the process-wide admission controller"""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
+
+
+class AccountedHttpRequest(HttpRequest):
+    """
+    HttpRequest that charges each executed call to its owner
+
+    Passed to build_from_document as the requestBuilder, bound to the owner's key.
+    """
+
+    def __init__(self, *args, owner=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.owner = owner
+
+    def execute(self, *args, **kwargs):
+        controller = get_controller()
+        controller.record_call(self.owner, self.methodId)
+        started = time.monotonic()
+        try:
+            return super().execute(*args, **kwargs)
+        finally:
+            controller.record_latency(time.monotonic() - started)
@@ -0,0 +1,280 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Tuple
+import os
+import pytz
+
+from batch import execute_batch
+from findEvents import get_calendars, list_calendar_events
+
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'  # same format the create/move endpoints take
+LOCAL_TZ = pytz.timezone('America/New_York')  # Change this to your timezone
+BUSY_ACCESS_ROLES = ('owner', 'writer')  # subscribed calendars (other people's) don't block time
+SCHEDULE_MAX_DAYS = int(os.environ.get('SCHEDULE_MAX_DAYS', '92'))  # longest horizon one request may search
+
+
+def busy_intervals(events, local_tz=LOCAL_TZ) -> List[Tuple[datetime, datetime]]:
+    """
+    Turn Google events into (start, end) busy intervals in naive local time
+
+    Events marked "free" (transparent), cancelled or declined by the user don't block time.
+    """
+    intervals = []
+    for event in events:
+        if event.get('transparency') == 'transparent' or event.get('status') == 'cancelled':
+            continue
+        if any(attendee.get('self') and attendee.get('responseStatus') == 'declined'
+               for attendee in event.get('attendees', [])):
+            continue
+
+        start = event.get('start', {})
+        end = event.get('end', {})
+        if 'dateTime' in start:
+            start_dt = datetime.fromisoformat(start['dateTime'].replace('Z', '+00:00'))
+            end_dt = datetime.fromisoformat(end.get('dateTime', start['dateTime']).replace('Z', '+00:00'))
+            intervals.append((
+                start_dt.astimezone(local_tz).replace(tzinfo=None),
+                end_dt.astimezone(local_tz).replace(tzinfo=None)
+            ))
+        elif 'date' in start:
+            # All-day events block whole days (end date is exclusive)
+            intervals.append((
+                datetime.strptime(start['date'], '%Y-%m-%d'),
+                datetime.strptime(end.get('date', start['date']), '%Y-%m-%d')
+            ))
+    return intervals
+
+
+def merge_intervals(intervals, padding=timedelta(0)):
+    """Sort intervals, widen each by padding on both sides, and merge overlaps"""
+    merged = []
+    for start, end in sorted(intervals):
+        start, end = start - padding, end + padding
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def free_slots(busy, horizon_start, horizon_end, work_start, work_end, working_days, buffer=timedelta(0),
+               earliest=None):
+    """
+    Sweep the working windows of each day against the merged busy intervals
+
+    Args:
+        busy: List of (start, end) naive local datetimes
+        horizon_start, horizon_end: Dates bounding the search (inclusive)
+        work_start, work_end: datetime.time bounds of the working day
+        working_days: Weekdays to use, Monday=0
+        buffer: Gap kept between existing events and placed tasks
+        earliest: No gap starts before this naive local datetime, e.g. now (optional)
+
+    Returns:
+        Sorted list of [start, end] free gaps
+    """
+    merged = merge_intervals(busy, buffer)
+    gaps = []
+    i = 0
+    day = horizon_start
+    while day <= horizon_end:
+        if day.weekday() in working_days:
+            window_start = datetime.combine(day, work_start)
+            window_end = datetime.combine(day, work_end)
+            if earliest is not None and window_start < earliest:
+                window_start = earliest
+            if window_start >= window_end:
+                day += timedelta(days=1)
+                continue
+            # Skip busy intervals that end before this window
+            while i < len(merged) and merged[i][1] <= window_start:
+                i += 1
+            cursor = window_start
+            j = i
+            while j < len(merged) and merged[j][0] < window_end:
+                if merged[j][0] > cursor:
+                    gaps.append([cursor, merged[j][0]])
+                cursor = max(cursor, merged[j][1])
+                j += 1
+            if cursor < window_end:
+                gaps.append([cursor, window_end])
+        day += timedelta(days=1)
+    return gaps
+
+
+def place_tasks(gaps, tasks, buffer=timedelta(0)):
+    """
+    Place tasks into free gaps, highest priority first, then earliest deadline
+
+    Each task goes into the earliest gap that fits it (after its not_before and
+    before its deadline). The gap is split around the placed task plus buffer.
+    Gaps are kept sorted, so the first candidate is found by bisecting on gap end.
+
+    Args:
+        gaps: Sorted list of [start, end] free gaps (modified in place)
+        tasks: List of dicts with title, duration_minutes and optional
+               priority, deadline and not_before (naive local datetimes)
+        buffer: Gap kept between consecutive tasks
+
+    Returns:
+        (placed, unplaced) where placed is a list of (task, start, end)
+    """
+    order = sorted(
+        range(len(tasks)),
+        key=lambda k: (-(tasks[k].get('priority') or 0), tasks[k].get('deadline') or datetime.max, k)
+    )
+    ends = [gap[1] for gap in gaps]
+    placed = []
+    unplaced = []
+
+    for k in order:
+        task = tasks[k]
+        duration = timedelta(minutes=task['duration_minutes'])
+        earliest = task.get('not_before') or datetime.min
+        deadline = task.get('deadline') or datetime.max
+
+        slot = None
+        index = bisect_right(ends, earliest)
+        while index < len(gaps):
+            gap_start, gap_end = gaps[index]
+            start = max(gap_start, earliest)
+            if start + duration > deadline:
+                break  # gaps are sorted, so every later one misses the deadline too
+            if start + duration <= gap_end:
+                slot = (index, start)
+                break
+            index += 1
+
+        if slot is None:
+            unplaced.append(task)
+            continue
+
+        index, start = slot
+        end = start + duration
+        gap_start, gap_end = gaps[index]
+        pieces = []
+        if start - buffer > gap_start:
+            pieces.append([gap_start, start - buffer])
+        if end + buffer < gap_end:
+            pieces.append([end + buffer, gap_end])
+        gaps[index:index + 1] = pieces
+        ends[index:index + 1] = [piece[1] for piece in pieces]
+        placed.append((task, start, end))
+
+    placed.sort(key=lambda item: item[1])
+    return placed, unplaced
+
+
+def schedule_tasks(service, tasks, start_date, end_date, working_hours_start='09:00', working_hours_end='17:00',
+                   working_days=(0, 1, 2, 3, 4), buffer_minutes=0, commit=False, calendar_id='primary',
+                   user_cache=None, busy_calendar_ids=None) -> Dict[str, Any]:
+    """
+    Find free time for a list of tasks across all of the user's calendars
+
+    Busy time is pulled once per calendar for the whole horizon, then the
+    placement is computed locally. Only the user's own calendars (owner or
+    writer access) block time unless busy_calendar_ids says otherwise. Nothing
+    is placed before the current time, and the horizon may cover at most
+    SCHEDULE_MAX_DAYS days. With commit=True the placement is written to
+    calendar_id in one batch of inserts.
+
+    Args:
+        service: Google Calendar service object
+        tasks: List of dicts with title, duration_minutes and optional priority
+               (higher first), deadline / not_before ('2024-01-15T17:00:00') and description
+        start_date, end_date: Horizon in YYYY-MM-DD format (inclusive)
+        working_hours_start, working_hours_end: Working day bounds in HH:MM format
+        working_days: Weekdays to schedule on, Monday=0
+        buffer_minutes: Minimum gap around every placed task
+        commit: Create the events instead of only proposing them
+        calendar_id: Calendar to create the events in when committing
+        busy_calendar_ids: Calendars whose events count as busy (optional)
+
+    Returns:
+        Dictionary with the scheduled and unscheduled tasks
+    """
+    horizon_start = datetime.strptime(start_date, '%Y-%m-%d').date()
+    horizon_end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    work_start = datetime.strptime(working_hours_start, '%H:%M').time()
+    work_end = datetime.strptime(working_hours_end, '%H:%M').time()
+    buffer = timedelta(minutes=buffer_minutes)
+    if work_end <= work_start:
+        raise ValueError(f"working hours end {working_hours_end} is not after start {working_hours_start}")
+    if buffer_minutes < 0 or any(task['duration_minutes'] <= 0 for task in tasks):
+        raise ValueError("durations must be positive and buffer_minutes must not be negative")
+
+    # Never propose (or create) events in the past
+    now = datetime.now(LOCAL_TZ).replace(tzinfo=None, second=0, microsecond=0)
+    horizon_start = max(horizon_start, now.date())
+    if (horizon_end - horizon_start).days + 1 > SCHEDULE_MAX_DAYS:
+        raise ValueError(f"the horizon may cover at most {SCHEDULE_MAX_DAYS} days")
+
+    parsed_tasks = []
+    for task in tasks:
+        parsed = dict(task)
+        for field in ('deadline', 'not_before'):
+            if parsed.get(field):
+                parsed[field] = datetime.strptime(parsed[field], TIME_FORMAT)
+        parsed_tasks.append(parsed)
+
+    # Pull busy time for the whole horizon once
+    time_min = LOCAL_TZ.localize(datetime.combine(horizon_start, datetime.min.time())).astimezone(pytz.UTC).isoformat()
+    time_max = LOCAL_TZ.localize(datetime.combine(horizon_end, datetime.max.time())).astimezone(pytz.UTC).isoformat()
+    if busy_calendar_ids is not None:
+        busy_calendars = list(busy_calendar_ids)
+    else:
+        busy_calendars = [calendar['id'] for calendar in get_calendars(service, user_cache)
+                          if calendar.get('accessRole') in BUSY_ACCESS_ROLES]
+    busy = []
+    skipped = []
+    for busy_calendar_id in busy_calendars:
+        try:
+            events = list_calendar_events(service, busy_calendar_id, time_min, time_max, user_cache)
+        except Exception as calendar_error:
+            # Same as find_events_by_date: one unreadable calendar doesn't fail the request
+            print(f"Error querying calendar {busy_calendar_id}: {calendar_error}")
+            skipped.append(busy_calendar_id)
+            continue
+        busy.extend(busy_intervals(events))
+    print(f"Scheduling {len(tasks)} tasks against {len(busy)} busy intervals from {len(busy_calendars)} calendars")
+
+    gaps = free_slots(busy, horizon_start, horizon_end, work_start, work_end, set(working_days), buffer, now)
+    placed, unplaced = place_tasks(gaps, parsed_tasks, buffer)
+
+    scheduled = [{
+        'title': task['title'],
+        'start_datetime': start.strftime(TIME_FORMAT),
+        'end_datetime': end.strftime(TIME_FORMAT),
+        'priority': task.get('priority') or 0
+    } for task, start, end in placed]
+
+    if commit and placed:
+        inserts = [
+            service.events().insert(calendarId=calendar_id, body={
+                'summary': task['title'],
+                'description': task.get('description') or '',
+                'start': {'dateTime': item['start_datetime'], 'timeZone': 'America/New_York'},
+                'end': {'dateTime': item['end_datetime'], 'timeZone': 'America/New_York'},
+            })
+            for item, (task, _, _) in zip(scheduled, placed)
+        ]
+        for item, (created, error) in zip(scheduled, execute_batch(service, inserts)):
+            item['event_id'] = created.get('id') if error is None else None
+            if error is not None:
+                item['error'] = str(error)
+
+    return {
+        'success': not unplaced,
+        'committed': bool(commit),
+        'calendar_id': calendar_id,
+        'scheduled': scheduled,
+        'unscheduled': [{
+            'title': task['title'],
+            'duration_minutes': task['duration_minutes'],
+            'message': 'No free slot fits this task within its constraints'
+        } for task in unplaced],
+        'calendars_checked': [cid for cid in busy_calendars if cid not in skipped],
+        'calendars_skipped': skipped,
+        'message': f'Scheduled {len(scheduled)} of {len(tasks)} tasks'
+    }
@@ -0,0 +1,60 @@
+import math
+import os
+import tempfile
+import uvicorn
+
+
+def cgroup_cpu_limit():
+    """CPU quota of this container in cores (cgroup v2 or v1), or None if unlimited"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def worker_count():
+    """
+    Number of worker processes: WEB_CONCURRENCY if set, otherwise one per usable core
+
+    Usable cores are the CPU affinity set, capped by the container's cgroup CPU quota
+    (affinity alone reports every host core inside a limited container).
+    """
+    if os.environ.get('WEB_CONCURRENCY'):
+        return int(os.environ['WEB_CONCURRENCY'])
+    if hasattr(os, 'sched_getaffinity'):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cores = min(cores, max(1, math.ceil(limit)))
+    return cores
+
+
+if __name__ == "__main__":
+    # Workers are separate processes, so they need the shared on-disk cache
+    # to see each other's auth checks, calendar lists and event data
+    os.environ.setdefault('CACHE_BACKEND', 'disk')
+    if os.environ['CACHE_BACKEND'] == 'disk' and not os.environ.get('CACHE_DIR'):
+        # mkdtemp creates a fresh directory only this user can access (mode 0700)
+        os.environ['CACHE_DIR'] = tempfile.mkdtemp(prefix='calendarapi-cache-')
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.environ.get('PORT', '8000')),
+        workers=worker_count()
+    )
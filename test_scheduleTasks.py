@@ -0,0 +1,87 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from scheduleTasks import LOCAL_TZ, SCHEDULE_MAX_DAYS, TIME_FORMAT, free_slots, place_tasks, schedule_tasks
+
+MONDAY = date(2025, 1, 6)
+WORKDAYS = {0, 1, 2, 3, 4}
+
+
+def gaps_for(busy, buffer=timedelta(0), days=1, earliest=None):
+    return free_slots(busy, MONDAY, MONDAY + timedelta(days=days - 1), time(9), time(17), WORKDAYS, buffer, earliest)
+
+
+def at(hour, minute=0, day=MONDAY):
+    return datetime.combine(day, time(hour, minute))
+
+
+def test_free_slots_merges_busy_time_and_applies_buffer():
+    busy = [(at(10), at(11)), (at(10, 30), at(12))]
+    assert gaps_for(busy, timedelta(minutes=15)) == [[at(9), at(9, 45)], [at(12, 15), at(17)]]
+
+
+def test_free_slots_skips_weekends():
+    gaps = free_slots([], MONDAY, MONDAY + timedelta(days=6), time(9), time(17), WORKDAYS)
+    assert len(gaps) == 5
+    assert all(gap[0].weekday() in WORKDAYS for gap in gaps)
+
+
+def test_place_tasks_keeps_buffer_between_tasks_and_events():
+    buffer = timedelta(minutes=30)
+    gaps = gaps_for([(at(10), at(11))], buffer)
+    tasks = [{'title': f'Task {i}', 'duration_minutes': 60} for i in range(3)]
+    placed, unplaced = place_tasks(gaps, tasks, buffer)
+    assert unplaced == []
+    times = [(start, end) for _, start, end in placed]
+    assert times == [(at(11, 30), at(12, 30)), (at(13), at(14)), (at(14, 30), at(15, 30))]
+    for (_, end), (next_start, _) in zip(times, times[1:]):
+        assert next_start - end >= buffer
+
+
+def test_place_tasks_respects_not_before():
+    gaps = gaps_for([])
+    placed, _ = place_tasks(gaps, [{'title': 'Late', 'duration_minutes': 30, 'not_before': at(14, 10)}])
+    assert placed[0][1:] == (at(14, 10), at(14, 40))
+
+
+def test_place_tasks_respects_deadline_and_priority():
+    gaps = gaps_for([(at(10), at(16))])
+    tasks = [
+        {'title': 'Low', 'duration_minutes': 60, 'priority': 0},
+        {'title': 'Urgent', 'duration_minutes': 60, 'priority': 1, 'deadline': at(10)},
+        {'title': 'Too late', 'duration_minutes': 60, 'deadline': at(9, 30)},
+    ]
+    placed, unplaced = place_tasks(gaps, tasks)
+    assert [(task['title'], start) for task, start, _ in placed] == [('Urgent', at(9)), ('Low', at(16))]
+    assert [task['title'] for task in unplaced] == ['Too late']
+
+
+def test_free_slots_starts_no_earlier_than_now():
+    gaps = gaps_for([(at(16), at(16, 30))], days=2, earliest=at(15, 5))
+    assert gaps == [
+        [at(15, 5), at(16)], [at(16, 30), at(17)],
+        [at(9, day=MONDAY + timedelta(days=1)), at(17, day=MONDAY + timedelta(days=1))]
+    ]
+
+
+def test_free_slots_skips_a_day_that_is_already_over():
+    assert gaps_for([], earliest=at(18)) == []
+
+
+def test_schedule_tasks_never_places_before_now():
+    # No busy calendars, so no Google calls are made
+    today = datetime.now(LOCAL_TZ).date()
+    result = schedule_tasks(None, [{'title': 'Now-ish', 'duration_minutes': 15}],
+                            (today - timedelta(days=7)).isoformat(), (today + timedelta(days=7)).isoformat(),
+                            '00:00', '23:59', range(7), busy_calendar_ids=[])
+    start = datetime.strptime(result['scheduled'][0]['start_datetime'], TIME_FORMAT)
+    assert start >= datetime.now(LOCAL_TZ).replace(tzinfo=None) - timedelta(minutes=1)
+
+
+def test_schedule_tasks_rejects_too_long_horizon():
+    today = datetime.now(LOCAL_TZ).date()
+    with pytest.raises(ValueError):
+        schedule_tasks(None, [{'title': 'Task', 'duration_minutes': 15}],
+                       today.isoformat(), (today + timedelta(days=SCHEDULE_MAX_DAYS)).isoformat(),
+                       busy_calendar_ids=[])